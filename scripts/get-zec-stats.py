@@ -3,173 +3,232 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import math
+import os
+import ssl
 import sys
+import threading
+import time
 import urllib.error
 import urllib.request
-from datetime import datetime, timezone
+from concurrent.futures import Future
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
 
 CMC_DETAIL_URL = "https://api.coinmarketcap.com/data-api/v3/cryptocurrency/detail?id=1437"
 HEIGHT_FALLBACK_URL = "https://zcash.blockchain.saltlending.com/blocks/tip"
 OUTPUT_PATH = Path(__file__).resolve().parent.parent / "public" / "data" / "zec-stats.json"
+CACHE_DIR = Path(__file__).resolve().parent.parent / "target" / "stats_cache"
+CMC_CACHE_TTL_SECS = 120
+HEIGHT_CACHE_TTL_SECS = 30
+
+# The only parts of the CoinMarketCap detail payload that build_stats reads.
+CMC_DATA_FIELDS = ("symbol", "name", "rank", "statistics")
+# Alternative key names, in order of preference.
+PRICE_KEYS = ("current", "usd")
+MARKET_CAP_KEYS = ("current", "marketCap", "usd", "value")
+HEIGHT_KEYS = ("blockHeight", "height", "blocks")
 
 USER_AGENT = "zcash-radio-scripts/1.0"
 TIMEOUT_SECONDS = 10
 
-
-def fetch_coinmarketcap_payload() -> dict:
-    """Return the raw payload from CoinMarketCap or raise on failure."""
-
-    req = urllib.request.Request(
-        CMC_DETAIL_URL,
-        headers={
-            "Accept": "application/json, text/plain, */*",
-            "User-Agent": USER_AGENT,
-        },
-    )
+# One TLS context for every HTTPS connection. http.client would otherwise
+# build a default context, and reload the system CA bundle, per connection;
+# with two connections per run this saves one CA-bundle load. ALPN and
+# post-handshake auth match what http.client sets on its own contexts, so the
+# handshake is unchanged.
+_SSL_CONTEXT = ssl.create_default_context()
+_SSL_CONTEXT.set_alpn_protocols(["http/1.1"])
+if _SSL_CONTEXT.post_handshake_auth is not None:
+    _SSL_CONTEXT.post_handshake_auth = True
+
+# Opener used by every fetch: it sends our User-Agent and uses the shared TLS
+# context above.
+_OPENER = urllib.request.build_opener(urllib.request.HTTPSHandler(context=_SSL_CONTEXT))
+_OPENER.addheaders = [("User-Agent", USER_AGENT)]
+
+# Requests are built once at import and reused by every fetch.
+_CMC_REQUEST = urllib.request.Request(
+    CMC_DETAIL_URL,
+    headers={"Accept": "application/json, text/plain, */*"},
+)
+_HEIGHT_FALLBACK_REQUEST = urllib.request.Request(
+    HEIGHT_FALLBACK_URL,
+    headers={"Accept": "application/json"},
+)
+
+
+def _fetch_json_object(request: urllib.request.Request, source: str) -> dict:
+    """Fetch ``request`` and return its JSON object body, raising on any failure."""
 
     try:
-        with urllib.request.urlopen(req, timeout=TIMEOUT_SECONDS) as response:
+        with _OPENER.open(request, timeout=TIMEOUT_SECONDS) as response:
             if response.status != 200:
-                raise RuntimeError(
-                    f"unexpected status code {response.status} from CoinMarketCap"
-                )
-            payload: Any = json.load(response)
+                raise RuntimeError(f"unexpected status code {response.status} from {source}")
+            payload: Any = _load_json(response.read())
     except urllib.error.URLError as exc:  # pragma: no cover - network failure path
-        raise RuntimeError(f"failed to reach CoinMarketCap API ({exc})") from exc
+        raise RuntimeError(f"failed to reach {source} API ({exc})") from exc
     except json.JSONDecodeError as exc:
-        raise RuntimeError(f"invalid JSON payload from CoinMarketCap ({exc})") from exc
+        raise RuntimeError(f"invalid JSON payload from {source} ({exc})") from exc
 
     if not isinstance(payload, dict):
-        raise RuntimeError("CoinMarketCap response is not a JSON object")
+        raise RuntimeError(f"{source} response is not a JSON object")
     return payload
 
 
-def extract_rank(payload: dict) -> int | None:
-    """Return the best-effort rank from the API response."""
+def fetch_coinmarketcap_payload() -> tuple[dict, float]:
+    """Return the trimmed CoinMarketCap payload and when it was fetched, or raise.
 
-    data = payload.get("data") or {}
-    rank = data.get("rank")
-    if rank is not None:
-        return rank
+    The fetch time is a Unix timestamp; for a cache hit it is the time the
+    cache entry was written, not the current time.
+    """
 
-    statistics = data.get("statistics") or {}
-    rank = statistics.get("rank")
-    if rank is not None:
-        return rank
+    cached = _load_cached_cmc_payload()
+    if cached is not None:
+        return cached
 
-    market_pairs = statistics.get("marketPairs") or {}
-    return market_pairs.get("rank")
+    payload = _fetch_json_object(_CMC_REQUEST, "CoinMarketCap")
+    fetched_at = time.time()
+    payload = _slim_cmc_payload(payload)
+    # Error bodies carry a null or non-object "data"; never cache those.
+    if isinstance(payload["data"], dict):
+        _store_cached(CMC_DETAIL_URL, _encode_json(payload))
+    return payload, fetched_at
 
 
-def parse_price(statistics: dict) -> tuple[float | None, float | None]:
-    """Extract USD and BTC price quotes when available."""
+def _load_cached_cmc_payload() -> tuple[dict, float] | None:
+    """Return a fresh, well-formed cached CoinMarketCap payload and its fetch time."""
+
+    cached = _load_cached(CMC_DETAIL_URL, CMC_CACHE_TTL_SECS)
+    if cached is None:
+        return None
+    payload, fetched_at = cached
+    if not isinstance(payload, dict) or not isinstance(payload.get("data"), dict):
+        return None
+    return payload, fetched_at
+
+
+def _slim_cmc_payload(payload: dict) -> dict:
+    """Drop the descriptive fields (tags, urls, description, ...) we never read."""
+
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        return {"data": data}
+    return {"data": {key: data[key] for key in CMC_DATA_FIELDS if key in data}}
+
+
+def _extract_all(
+    payload: dict,
+) -> tuple[str, str, int | None, float | None, float | None, float | None, int | None]:
+    """Pull every field build_stats needs from the payload in a single pass.
+
+    Returns ``(name, symbol, rank, usd_price, btc_price, market_cap, height)``.
+    """
+
+    data = payload.get("data") or {}
+    statistics = data.get("statistics") or {}
+
+    rank = data.get("rank")
+    if rank is None:
+        rank = statistics.get("rank")
+    if rank is None:
+        rank = (statistics.get("marketPairs") or {}).get("rank")
 
-    price_info = statistics.get("price")
     usd_price: float | None = None
     btc_price: float | None = None
-
+    price_info = statistics.get("price")
     if isinstance(price_info, dict):
-        usd_candidate = price_info.get("current") or price_info.get("usd")
-        btc_candidate = price_info.get("btc")
-        usd_price = _coerce_number(usd_candidate)
-        btc_price = _coerce_number(btc_candidate)
+        usd_price = _coerce_number(_first_present(price_info, PRICE_KEYS))
+        btc_price = _coerce_number(price_info.get("btc"))
     elif isinstance(price_info, (int, float)):
         usd_price = _coerce_number(price_info)
 
-    return usd_price, btc_price
+    market_cap: float | None = None
+    market_cap_info = statistics.get("marketCap")
+    if isinstance(market_cap_info, dict):
+        market_cap = _coerce_number(_first_present(market_cap_info, MARKET_CAP_KEYS))
+    elif isinstance(market_cap_info, (int, float)):
+        market_cap = _coerce_number(market_cap_info)
 
+    height: int | None = None
+    height_info = _first_present(statistics, HEIGHT_KEYS)
+    if isinstance(height_info, (int, float)) and not isinstance(height_info, bool):
+        height = max(int(height_info), 0)
 
-def parse_market_cap(statistics: dict) -> float | None:
-    """Return the market cap value when available."""
-
-    market_cap = statistics.get("marketCap")
-    if isinstance(market_cap, dict):
-        value = (
-            market_cap.get("current")
-            or market_cap.get("marketCap")
-            or market_cap.get("usd")
-            or market_cap.get("value")
-        )
-        return _coerce_number(value)
-    if isinstance(market_cap, (int, float)):
-        return _coerce_number(market_cap)
-    return None
+    name = data.get("name") or "Zcash"
+    symbol = data.get("symbol") or "ZEC"
+    return name, symbol, rank, usd_price, btc_price, market_cap, height
 
 
-def parse_height(statistics: dict) -> int | None:
-    """Extract a best-effort block height from the statistics payload."""
+def _first_present(mapping: dict, keys: tuple[str, ...]) -> Any:
+    """Return the first non-None value among ``keys``; zero counts as present."""
 
-    height = (
-        statistics.get("blockHeight")
-        or statistics.get("height")
-        or statistics.get("blocks")
-    )
-    if isinstance(height, (int, float)) and not isinstance(height, bool):
-        rounded = int(height)
-        return max(rounded, 0)
-    return None
+    return next((mapping[key] for key in keys if mapping.get(key) is not None), None)
 
 
 def fetch_block_height() -> int | None:
     """Fetch a fallback chain height from an alternate API."""
 
-    req = urllib.request.Request(
-        HEIGHT_FALLBACK_URL,
-        headers={
-            "Accept": "application/json",
-            "User-Agent": USER_AGENT,
-        },
-    )
-
-    try:
-        with urllib.request.urlopen(req, timeout=TIMEOUT_SECONDS) as response:
-            if response.status != 200:
-                return None
-            payload: Any = json.load(response)
-    except (urllib.error.URLError, json.JSONDecodeError):  # pragma: no cover - network path
-        return None
+    cached = _load_cached(HEIGHT_FALLBACK_URL, HEIGHT_CACHE_TTL_SECS)
+    payload = cached[0] if cached is not None else None
+    if not isinstance(payload, dict):
+        try:
+            payload = _fetch_json_object(_HEIGHT_FALLBACK_REQUEST, "height fallback")
+        except RuntimeError:
+            return None
+        _store_cached(HEIGHT_FALLBACK_URL, _encode_json(payload))
 
-    height = payload.get("height") if isinstance(payload, dict) else None
+    height = payload.get("height")
     if isinstance(height, (int, float)) and not isinstance(height, bool):
         return max(int(height), 0)
     return None
 
 
-def build_stats(cmc_payload: dict) -> dict:
-    """Assemble the stats object written to disk."""
+def build_stats(
+    cmc_payload: dict,
+    height_fallback: Callable[[], int | None] = fetch_block_height,
+    fetched_at: float | None = None,
+) -> dict:
+    """Assemble the stats object written to disk.
 
-    data = cmc_payload.get("data") or {}
-    symbol = data.get("symbol") or "ZEC"
-    name = data.get("name") or "Zcash"
-    rank = extract_rank(cmc_payload)
-    statistics = data.get("statistics") or {}
+    ``height_fallback`` is only invoked when CoinMarketCap omits the height.
+    ``fetched_at`` is the Unix time the payload was fetched; it defaults to now.
+    """
 
-    usd_price_cmc, btc_price_cmc = parse_price(statistics)
-    market_cap_cmc = parse_market_cap(statistics)
-    height = parse_height(statistics)
+    (
+        name,
+        symbol,
+        rank,
+        usd_price_cmc,
+        btc_price_cmc,
+        market_cap_cmc,
+        height,
+    ) = _extract_all(cmc_payload)
 
     height_sources: dict[str, str] = {}
     if height is None:
-        height_fallback = fetch_block_height()
-        if height_fallback is not None:
-            height = height_fallback
+        fallback_height = height_fallback()
+        if fallback_height is not None:
+            height = fallback_height
             height_sources["height_fallback"] = HEIGHT_FALLBACK_URL
 
-    timestamp = datetime.now(timezone.utc).isoformat()
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(fetched_at))
 
-    milli_btc_usd: float | None = None
-    if (
-        usd_price_cmc is not None
-        and btc_price_cmc is not None
-        and btc_price_cmc > 0
-    ):
-        usd_per_btc = usd_price_cmc / btc_price_cmc
-        if math.isfinite(usd_per_btc):
-            milli_btc_usd = usd_per_btc * 0.001
+    # Both prices are already finite, so with a positive BTC price the ratio
+    # is finite for any realistic quote.
+    milli_btc_usd = (
+        usd_price_cmc * 0.001 / btc_price_cmc
+        if usd_price_cmc is not None and btc_price_cmc is not None and btc_price_cmc > 0
+        else None
+    )
 
     sources: dict[str, str] = {"coinmarketcap": CMC_DETAIL_URL}
     sources.update(height_sources)
@@ -189,37 +248,159 @@ def build_stats(cmc_payload: dict) -> dict:
     }
 
 
-def _coerce_number(value: object) -> float | None:
-    if isinstance(value, str):
-        try:
-            parsed = float(value)
-        except ValueError:
+def _cache_path(url: str) -> Path:
+    return CACHE_DIR / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _load_cached(url: str, ttl_seconds: float) -> tuple[Any, float] | None:
+    """Return the cached payload for ``url`` and its write time, if within the TTL."""
+
+    path = _cache_path(url)
+    try:
+        written_at = path.stat().st_mtime
+        if time.time() - written_at > ttl_seconds:
             return None
-        if math.isfinite(parsed):
-            return parsed
+        return _load_json(path.read_bytes()), written_at
+    except (OSError, ValueError):
         return None
-    if isinstance(value, (int, float)) and not isinstance(value, bool):
-        as_float = float(value)
-        if math.isfinite(as_float):
-            return as_float
+
+
+def _store_cached(url: str, encoded: bytes) -> None:
+    """Persist an encoded payload for ``url``, replacing any previous entry atomically."""
+
+    path = _cache_path(url)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(encoded)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        print(f"cache: failed to write entry ({exc})", file=sys.stderr)
+
+
+def _load_json(raw: bytes) -> Any:
+    """Decode a JSON document, preferring orjson when it is installed."""
+
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _encode_json(value: Any) -> bytes:
+    """Serialize a value as compact JSON bytes."""
+
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _dump_json(stats: dict) -> bytes:
+    """Serialize stats as sorted, two-space indented JSON with a trailing newline.
+
+    The exact bytes depend on whether orjson is installed: orjson writes
+    non-ASCII text as raw UTF-8 and floats like ``0.00005`` or ``1e16``,
+    where the stdlib emits ``\\u00e9``-style escapes, ``5e-05`` and ``1e+16``. Both are
+    valid JSON and decode to the same values.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(
+            stats,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE,
+        )
+    return (json.dumps(stats, indent=2, sort_keys=True) + "\n").encode("utf-8")
+
+
+def _coerce_number(value: object) -> float | None:
+    # Only hashable scalars can be numbers; everything else is rejected
+    # before it reaches the cache.
+    if isinstance(value, (str, int, float)):
+        return _coerce_scalar(value)
     return None
 
 
+# typed=True keeps values that compare equal across types, such as True and 1
+# or 1 and 1.0, in separate cache slots.
+@lru_cache(maxsize=128, typed=True)
+def _coerce_scalar(value: str | int | float) -> float | None:
+    match value:
+        case bool():
+            return None
+        case int():
+            # Ints are never NaN or infinite, so only floats need the check.
+            return float(value)
+        case float():
+            return value if math.isfinite(value) else None
+        case str():
+            try:
+                parsed = float(value)
+            except ValueError:
+                return None
+            return parsed if math.isfinite(parsed) else None
+        case _:
+            return None
+
+
 def write_stats(stats: dict) -> None:
+    # Write a sibling file and rename it over the output so readers never
+    # see a partially written document.
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_PATH.open("w", encoding="utf-8") as handle:
-        json.dump(stats, handle, indent=2, sort_keys=True)
-        handle.write("\n")
+    tmp_path = OUTPUT_PATH.with_suffix(".json.tmp")
+    try:
+        with tmp_path.open("wb") as handle:
+            handle.write(_dump_json(stats))
+        os.replace(tmp_path, OUTPUT_PATH)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _start_daemon(fn: Callable[[], Any]) -> Future:
+    """Run ``fn`` on a daemon thread and return a future for its result.
+
+    Unlike an executor worker, the thread is not joined at interpreter exit,
+    so an unneeded request never delays the process.
+    """
+
+    future: Future = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as exc:  # pragma: no cover - surfaced via result()
+            future.set_exception(exc)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
 
 
 def main() -> int:
-    try:
-        payload = fetch_coinmarketcap_payload()
-    except RuntimeError as exc:
-        print(f"Error: {exc}", file=sys.stderr)
-        return 1
+    cached = _load_cached_cmc_payload()
+    if cached is not None and _extract_all(cached[0])[-1] is not None:
+        # A cached payload that already reports a height needs no requests.
+        payload, fetched_at = cached
+        height_fallback: Callable[[], int | None] = fetch_block_height
+    else:
+        # Both requests are I/O-bound, so the fallback height is fetched in the
+        # background while CoinMarketCap is queried. Its result is only awaited
+        # when CoinMarketCap does not report a height; otherwise the daemon
+        # thread is abandoned and does not hold up exit.
+        height_future = _start_daemon(fetch_block_height)
+        height_fallback = height_future.result
 
-    stats = build_stats(payload)
+        try:
+            payload, fetched_at = cached or fetch_coinmarketcap_payload()
+        except RuntimeError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 1
+
+    stats = build_stats(
+        payload,
+        height_fallback=height_fallback,
+        fetched_at=fetched_at,
+    )
 
     try:
         write_stats(stats)